@@ -17,6 +17,13 @@ import datetime
 from pyspedas.cotrans.igrf import set_igrf_params
 from pyspedas.cotrans.j2000 import set_j2000_params
 
+# Contraction path for the batched (N,3,3) x (N,3,K) rotations, computed once at import rather than on
+# every call. Recent NumPy 2.x releases evaluate an optimized 2-operand einsum with a batch index as a
+# batched matmul (bmm_einsum); NumPy 1.x still runs it in the generic C loop, so there the path only
+# saves the path search
+_BATCH_ROTATE_PATH = np.einsum_path('nij,njk->nik', np.empty((1, 3, 3)), np.empty((1, 3, 1)),
+                                    optimize='greedy')[0]
+
 
 def get_time_parts(time_in):
     """
@@ -312,6 +319,46 @@ def tgeigse_vect(time_in, data_in):
     return xgse, ygse, zgse
 
 
+def tgeigse_mat(time_in):
+    """
+    GEI to GSE rotation matrices.
+
+    Parameters
+    ----------
+    time_in: list of float
+        Time array.
+
+    Returns
+    -------
+    mat: array of float
+        Rotation matrix for each time, shape (N, 3, 3). GSE = mat @ GEI, and
+        the transposed matrices give the GSE to GEI transformation.
+
+    """
+    gst, slong, sra, sdec, obliq = csundir_vect(time_in)
+
+    gs1 = np.cos(sra) * np.cos(sdec)
+    gs2 = np.sin(sra) * np.cos(sdec)
+    gs3 = np.sin(sdec)
+
+    ge1 = 0.0
+    ge2 = -np.sin(obliq)
+    ge3 = np.cos(obliq)
+
+    mat = np.empty((len(gs1), 3, 3))
+    mat[:, 0, 0] = gs1
+    mat[:, 0, 1] = gs2
+    mat[:, 0, 2] = gs3
+    mat[:, 1, 0] = ge2 * gs3 - ge3 * gs2
+    mat[:, 1, 1] = ge3 * gs1 - ge1 * gs3
+    mat[:, 1, 2] = ge1 * gs2 - ge2 * gs1
+    mat[:, 2, 0] = ge1
+    mat[:, 2, 1] = ge2
+    mat[:, 2, 2] = ge3
+
+    return mat
+
+
 def subgei2gse(time_in, data_in):
     """
     Transform data from GEI to GSE.
@@ -334,6 +381,28 @@ def subgei2gse(time_in, data_in):
     return np.column_stack([xgse, ygse, zgse])
 
 
+def subgei2gse_batch(time_in, data_in):
+    """
+    Transform several sets of vectors from GEI to GSE at once.
+
+    Parameters
+    ----------
+    time_in: list of float
+        Time array.
+    data_in: array of float
+        Coordinates in GEI, shape (N, 3, K): K vectors for each of the N times.
+
+    Returns
+    -------
+    Array of float
+        Coordinates in GSE, shape (N, 3, K).
+
+    """
+    mat = tgeigse_mat(time_in)
+    logging.info("Running transformation: subgei2gse_batch")
+    return np.einsum('nij,njk->nik', mat, data_in, optimize=_BATCH_ROTATE_PATH)
+
+
 def tgsegei_vect(time_in, data_in):
     """
     GSE to GEI transformation.
@@ -401,6 +470,28 @@ def subgse2gei(time_in, data_in):
     return np.column_stack([xgei, ygei, zgei])
 
 
+def subgse2gei_batch(time_in, data_in):
+    """
+    Transform several sets of vectors from GSE to GEI at once.
+
+    Parameters
+    ----------
+    time_in: list of float
+        Time array.
+    data_in: array of float
+        Coordinates in GSE, shape (N, 3, K): K vectors for each of the N times.
+
+    Returns
+    -------
+    Array of float
+        Coordinates in GEI, shape (N, 3, K).
+
+    """
+    mat = tgeigse_mat(time_in)
+    logging.info("Running transformation: subgse2gei_batch")
+    return np.einsum('nji,njk->nik', mat, data_in, optimize=_BATCH_ROTATE_PATH)
+
+
 def tgsegsm_vect(time_in, data_in):
     """
     Transform data from GSE to GSM.
@@ -10,10 +10,13 @@ These tests include the function in the following files:
 
 """
 import unittest
+import numpy as np
 import pyspedas
 import logging
+from numpy.testing import assert_allclose
 from pyspedas.themis.cotrans.dsl2gse import dsl2gse
 from pyspedas.cotrans.cotrans import cotrans
+from pyspedas.cotrans.cotrans_lib import subgei2gse, subgse2gei, subgei2gse_batch, subgse2gei_batch, tgeigse_mat
 from pyspedas.cotrans.fac_matrix_make import fac_matrix_make
 from pytplot import get_data, store_data, del_data
 from pyspedas import cotrans_get_coord, cotrans_set_coord, sm2mlt
@@ -315,6 +318,18 @@ class CotransTestCases(unittest.TestCase):
         for i in range(4):
             self.assertTrue(abs(mlt_idl[i]-mlt_python[i]) <= 1e-6)
 
+    def test_tgeigse_mat(self):
+        """Test that the GEI/GSE rotation matrices and batch transforms agree with subgei2gse and subgse2gei."""
+        times = np.linspace(1.2e9, 1.2e9 + 86400.0, 100)
+        vecs = np.column_stack((np.cos(times), np.sin(times), np.full(100, 0.5)))
+        mat = tgeigse_mat(times)
+        assert_allclose(np.einsum('nij,nj->ni', mat, vecs), subgei2gse(times, vecs), atol=1e-12)
+        assert_allclose(np.einsum('nji,nj->ni', mat, vecs), subgse2gei(times, vecs), atol=1e-12)
+        # The batch versions transform several vectors per time, stacked along the last axis
+        batch = np.stack((vecs, -vecs), axis=-1)
+        assert_allclose(subgei2gse_batch(times, batch)[..., 1], -subgei2gse(times, vecs), atol=1e-12)
+        assert_allclose(subgse2gei_batch(times, batch)[..., 1], -subgse2gei(times, vecs), atol=1e-12)
+
 
 if __name__ == '__main__':
     unittest.main()
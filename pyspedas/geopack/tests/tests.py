@@ -1,4 +1,5 @@
 import unittest
+from functools import lru_cache
 
 import numpy as np
 
@@ -19,12 +20,21 @@ from pytplot import join_vec, store_data, get_data, tdeflag, del_data
 trange = ['2015-10-16', '2015-10-17']
 
 
-def get_params(model, g_variables=None):
+@lru_cache(maxsize=None)
+def load_support_data():
+    # The DST and OMNI data are the same for every model, so only download and join them once
     support_trange = [time_double(trange[0])-60*60*24, 
                       time_double(trange[1])+60*60*24]
     pyspedas.kyoto.dst(trange=support_trange)
     pyspedas.omni.data(trange=trange)
     join_vec(['BX_GSE', 'BY_GSM', 'BZ_GSM'])
+
+
+def get_params(model, g_variables=None):
+    # Reload if the support variables were deleted since they were cached
+    if not data_exists('kyoto_dst') or not data_exists('BX_GSE-BY_GSM-BZ_GSM_joined'):
+        load_support_data.cache_clear()
+    load_support_data()
     if model == 't01' and g_variables is None:
         g_variables = [6.0, 10.0]
     else:
@@ -42,19 +52,24 @@ def get_params(model, g_variables=None):
 
 
 class LoadTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Load the MEC, Kyoto DST and OMNI data once for the whole class, rather than once per test
+        cls.mec_vars = pyspedas.mms.mec(trange=trange)
+        cls.params_t96 = get_params('t96')
+        cls.params_t01 = get_params('t01')
+        cls.params_ts04 = get_params('ts04')
+
     def test_igrf(self):
-        mec_vars = pyspedas.mms.mec(trange=trange)
         tt89('mms1_mec_r_gsm', igrf_only=True)
         self.assertTrue(data_exists('mms1_mec_r_gsm_bt89'))
 
     def test_tt89(self):
-        mec_vars = pyspedas.mms.mec(trange=trange)
         tt89('mms1_mec_r_gsm')
         self.assertTrue(data_exists('mms1_mec_r_gsm_bt89'))
 
     def test_tt96(self):
-        mec_vars = pyspedas.mms.mec(trange=trange)
-        params = get_params('t96')
+        params = self.params_t96
         # This interpolation can result in NaNs in the position variable, so they need to be cleaned
         tinterpol('mms1_mec_r_gsm', 'proton_density')
         tdeflag('mms1_mec_r_gsm-itrp',newname='mms1_clean')
@@ -62,8 +77,7 @@ class LoadTestCases(unittest.TestCase):
         self.assertTrue(data_exists('mms1_clean_bt96'))
 
     def test_tt01(self):
-        mec_vars = pyspedas.mms.mec(trange=trange)
-        params = get_params('t01')
+        params = self.params_t01
         # This can yield nans in the interpolated position variable for times outside the range of proton_density.
         # We don't want to pass NaNs to any of the geopack routines, so deflag
         tinterpol('mms1_mec_r_gsm', 'proton_density')
@@ -94,8 +108,7 @@ class LoadTestCases(unittest.TestCase):
         self.assertTrue(data_exists('mms1_clean_bt01'))
 
     def test_tts04(self):
-        mec_vars = pyspedas.mms.mec(trange=trange)
-        params = get_params('ts04')
+        params = self.params_ts04
         tinterpol('mms1_mec_r_gsm', 'proton_density')
         tts04('mms1_mec_r_gsm-itrp', parmod=params)
         self.assertTrue(data_exists('mms1_mec_r_gsm-itrp_bts04'))
@@ -105,8 +118,6 @@ class LoadTestCases(unittest.TestCase):
 
     def test_errors(self):
         # exercise some of the error code
-        mec_vars = pyspedas.mms.mec(trange=trange)
-        params = get_params('ts04')
         tinterpol('mms1_mec_r_gsm', 'proton_density')
         tts04('var_doesnt_exist')
         tts04('mms1_mec_r_gsm-itrp', parmod=None)
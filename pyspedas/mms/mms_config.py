@@ -6,7 +6,8 @@ CONFIG = {'local_data_dir': 'pydata',
           'mirror_data_dir': None, # e.g., '/Volumes/data_network/data/mms'
           'debug_mode': False,
           'download_only': False,
-          'no_download': False}
+          'no_download': False,
+          'max_workers': 8} # maximum number of concurrent downloads from the SDC
 
 # override local data directory with environment variables
 if os.environ.get('SPEDAS_DATA_DIR'):
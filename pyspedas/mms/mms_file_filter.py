@@ -1,5 +1,7 @@
 import re
 
+VERSION_REGEX = re.compile(r'v([0-9]+)\.([0-9]+)\.([0-9]+)\.cdf$')
+
 
 def mms_file_filter(files, latest_version=False, major_version=False, min_version=None, version=None):
     """
@@ -40,47 +42,43 @@ def mms_file_filter(files, latest_version=False, major_version=False, min_versio
         elif n_declms == 2:
             version = version + '.0'
 
+    # parse the requested version #s once, rather than once per file
+    if min_version is not None:
+        min_version_num = tuple(int(v) for v in min_version.split('.')[:3])
+    elif version is not None:
+        exact_version_num = tuple(int(v) for v in version.split('.')[:3])
+
     out_files = []
     file_versions = []
     max_major_version = 0
-    max_version = 0
+    max_version = (0, 0, 0)
 
     # find all of the version #s, including the max major version and max total version
     for file in files:
-        version_found = re.search(r'v([0-9]+)\.([0-9]+)\.([0-9]+)\.cdf$', file)
+        version_found = VERSION_REGEX.search(file)
         if version_found:
-            file_version = version_found.groups()
             # vX.Y.Z
-            version_X = int(file_version[0])
-            version_Y = int(file_version[1])
-            version_Z = int(file_version[2])
-            file_versions.append((version_X, version_Y, version_Z, file))
-            if version_X > max_major_version:
-                max_major_version = version_X
-            if max_version == 0:
-                max_version = (version_X, version_Y, version_Z)
-            else:
-                if (version_X > max_version[0]) or (version_X == max_version[0] and version_Y > max_version[1]) or (version_X == max_version[0] and version_Y == max_version[1] and version_Z > max_version[2]):
-                    max_version = (version_X, version_Y, version_Z)
-        else:
-            continue
+            file_version = tuple(int(v) for v in version_found.groups())
+            file_versions.append((file_version, file))
+            if file_version[0] > max_major_version:
+                max_major_version = file_version[0]
+            if file_version > max_version:
+                max_version = file_version
 
-    for file_ver in file_versions:
+    for file_version, file in file_versions:
         if min_version is not None: # MINIMUM file version
-            min_version_num = [int(v) for v in min_version.split('.')]
-            if (file_ver[0] > min_version_num[0]) or (file_ver[0] == min_version_num[0] and file_ver[1] > min_version_num[1]) or (file_ver[0] == min_version_num[0] and file_ver[1] == min_version_num[1] and file_ver[2] >= min_version_num[2]):
-                out_files.append(file_ver[3])
+            if file_version >= min_version_num:
+                out_files.append(file)
         elif version is not None: # EXACT file version
-            exact_version_num = [int(v) for v in version.split('.')]
-            if file_ver[0] == exact_version_num[0] and file_ver[1] == exact_version_num[1] and file_ver[2] == exact_version_num[2]:
-                out_files.append(file_ver[3])
+            if file_version == exact_version_num:
+                out_files.append(file)
         elif latest_version is not False: # LATEST (full) version, i.e., latest X.Y.Z
-            if file_ver[0] == max_version[0] and file_ver[1] == max_version[1] and file_ver[2] == max_version[2]:
-                out_files.append(file_ver[3])
+            if file_version == max_version:
+                out_files.append(file)
         elif major_version is not False: # LATEST MAJOR version, i.e., latest X in vX.Y.Z
-            if file_ver[0] >= max_major_version:
-                out_files.append(file_ver[3])
+            if file_version[0] >= max_major_version:
+                out_files.append(file)
         else:
-            out_files.append(file_ver[3])
+            out_files.append(file)
 
     return out_files
@@ -1,6 +1,6 @@
-import re
+import numpy as np
+import pandas as pd
 from dateutil.parser import parse
-from bisect import bisect_left
 
 
 def mms_files_in_interval(in_files, trange):
@@ -22,26 +22,28 @@ def mms_files_in_interval(in_files, trange):
     ---------
         List of hash tables containing file names, sizes and their time tags
     """
-    file_name = r'mms.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf'
+    file_name = r'^mms.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf'
 
-    file_times = []
+    if len(in_files) == 0:
+        return []
 
-    regex = re.compile(file_name)
+    files = pd.DataFrame(in_files, columns=['file_name', 'timetag', 'file_size'])
 
-    for file in in_files:
-        matches = regex.match(file['file_name'])
-        if matches:
-            file_times.append((file['file_name'], parse(matches.groups()[0]).timestamp(), file['timetag'], file['file_size']))
+    # parse the start times out of all of the file names at once; these are either
+    # YYYYMMDD or YYYYMMDDhhmmss, so pad them out to the longer form
+    start_times = files['file_name'].str.extract(file_name, expand=True)[0]
+    files = files[start_times.notna()]
+    start_times = pd.to_datetime(start_times[start_times.notna()].str.ljust(14, '0'), format='%Y%m%d%H%M%S')
 
     # sort in time
-    sorted_files = sorted(file_times, key=lambda x: x[1])
+    order = np.argsort(start_times.to_numpy(), kind='stable')
+    files = files.iloc[order]
+    times = start_times.to_numpy()[order]
 
-    times = [t[1] for t in sorted_files]
-
-    idx_min = bisect_left(times, parse(trange[0]).timestamp())
+    idx_min = np.searchsorted(times, np.datetime64(parse(trange[0]).replace(tzinfo=None)), side='left')
 
     # note: purposefully liberal here; include one extra file so that we always get the burst mode data
-    if idx_min == 0:
-        return [{'file_name': f[0], 'timetag': f[2], 'file_size': f[3]} for f in sorted_files[idx_min:]]
-    else:
-        return [{'file_name': f[0], 'timetag': f[2], 'file_size': f[3]} for f in sorted_files[idx_min-1:]]
+    if idx_min != 0:
+        idx_min -= 1
+
+    return [{'file_name': f.file_name, 'timetag': f.timetag, 'file_size': f.file_size} for f in files.iloc[idx_min:].itertuples(index=False)]
@@ -9,8 +9,9 @@ from pytplot import time_clip as tclip
 from pytplot import time_double, time_string
 from dateutil.parser import parse
 from datetime import timedelta, datetime
-from shutil import copyfileobj, copy
-from tempfile import NamedTemporaryFile
+from shutil import copyfileobj
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .mms_config import CONFIG
 from .mms_get_local_files import mms_get_local_files
 from .mms_files_in_interval import mms_files_in_interval
@@ -19,6 +20,74 @@ from .mms_file_filter import mms_file_filter
 from .mms_load_data_spdf import mms_load_data_spdf
 
 
+def _local_file_stat(out_file):
+    """
+    Returns the os.stat_result for a local file, or None if it doesn't exist; a single
+    stat call replaces the separate exists/size checks
+    """
+    try:
+        return os.stat(out_file)
+    except FileNotFoundError:
+        return None
+
+
+def _parse_timetag(timetag):
+    """
+    Parses an SDC time tag; these have a fixed format, so try strptime before falling back to the
+    (much slower) general dateutil parser
+    """
+    try:
+        return datetime.strptime(timetag, '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return parse(timetag)
+
+
+def _sdc_file_in_group(file_name, level, datatype):
+    """
+    Checks whether a file returned by the SDC belongs to the requested level and datatype; file names
+    are of the form mms1_fgm_srvy_l2_20151016_v4.18.0.cdf or mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf
+    """
+    name_parts = file_name.split('_')
+    if len(name_parts) < 6 or name_parts[3].lower() != level.lower():
+        return False
+    if datatype == '':
+        return True
+    return len(name_parts) > 6 and name_parts[4].lower() == datatype.lower()
+
+
+def _download_one(session, download_url, out_file, out_dir, headers):
+    """
+    Downloads a single file from the SDC directly to out_file; returns the local file name
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=ResourceWarning)
+        fsrc = session.get(download_url, stream=True, verify=True, headers=headers)
+
+    # make sure the response is released back to the connection pool even if the copy fails,
+    # so that the remaining downloads can reuse the connection
+    with closing(fsrc):
+        logging.info('Downloading ' + os.path.basename(out_file) + ' to ' + out_dir)
+
+        # several downloads may be creating the same directory concurrently
+        os.makedirs(out_dir, exist_ok=True)
+
+        # write to a partial file next to the destination, then move it into place once the
+        # download completes, so that an interrupted download never leaves a truncated CDF behind
+        part_file = out_file + '.part'
+        # the session accepts gzip-encoded responses, so have the raw stream decode them as it's read
+        fsrc.raw.decode_content = True
+        try:
+            with open(part_file, 'wb', buffering=1 << 20) as f:
+                copyfileobj(fsrc.raw, f, length=1 << 20)
+        except BaseException:
+            if os.path.exists(part_file):
+                os.unlink(part_file)
+            raise
+
+    os.replace(part_file, out_file)
+    return out_file
+
+
 def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srvy', level='l2', 
     instrument='fgm', datatype='', varformat=None, exclude_format=None, prefix='', suffix='', get_support_data=False, time_clip=False,
     no_update=False, center_measurement=False, available=False, notplot=False, latest_version=False, 
@@ -69,55 +138,74 @@ def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srv
     if not no_download:
         sdc_session, user = mms_login_lasp(always_prompt=always_prompt, headers=headers)
 
-    out_files = []
+    # a set, so that files reached through more than one probe/level/datatype group are only loaded once
+    out_files = set()
     available_files = []
 
+    # the query dates only depend on trange, so they're computed once rather than for every probe and data rate
+    day_start_date = parse(trange[0]).strftime('%Y-%m-%d') # need to request full day, then parse out later
+    end_date = time_string(time_double(trange[1])-0.1, fmt='%Y-%m-%d-%H-%M-%S') # -1 second to avoid getting data for the next day
+
+    # kludge to fix issue for burst mode data in files from the previous day
+    brst_start_date = day_start_date
+    day_start = time_double(day_start_date)
+    sec_from_start_of_day = time_double(trange[0])-day_start
+
+    # check if we're within 10 minutes of the start of the day
+    # and if so, grab 10 minutes of data from the end of the
+    # previous day
+    if sec_from_start_of_day <= 600.0:
+        brst_start_date = time_string(day_start-600.0, fmt='%Y-%m-%d-%H-%M-%S')
+
     for prb in probe:
         for drate in data_rate:
-            start_date = parse(trange[0]).strftime('%Y-%m-%d') # need to request full day, then parse out later
-            end_date = parse(time_string(time_double(trange[1])-0.1)).strftime('%Y-%m-%d-%H-%M-%S') # -1 second to avoid getting data for the next day
-            # kludge to fix issue for burst mode data in files from the previous day
-            if drate == 'brst':
-                sec_from_start_of_day = time_double(trange[0])-time_double(start_date)
-
-                # check if we're within 10 minutes of the start of the day
-                # and if so, grab 10 minutes of data from the end of the
-                # previous day
-                if sec_from_start_of_day <= 600.0:
-                    start_date = time_string(time_double(start_date)-600.0, fmt='%Y-%m-%d-%H-%M-%S')
+            start_date = brst_start_date if drate == 'brst' else day_start_date
+
+            if user is None:
+                url = 'https://lasp.colorado.edu/mms/sdc/public/files/api/v1/file_info/science?start_date=' + start_date + '&end_date=' + end_date + '&sc_id=mms' + prb + '&instrument_id=' + instrument + '&data_rate_mode=' + drate
+            else:
+                url = 'https://lasp.colorado.edu/mms/sdc/sitl/files/api/v1/file_info/science?start_date=' + start_date + '&end_date=' + end_date + '&sc_id=mms' + prb + '&instrument_id=' + instrument + '&data_rate_mode=' + drate
+
+            # the SDC accepts comma-separated lists of levels and descriptors, so a single request covers
+            # every level/datatype combination; the results are split back into groups below
+            url = url + '&data_level=' + ','.join(level)
+
+            if '' not in datatype:
+                url = url + '&descriptor=' + ','.join(datatype)
+
+            if CONFIG['debug_mode']: logging.info('Fetching: ' + url)
+
+            sdc_files = None
+            if not no_download:
+                # query list of available files
+                try:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore", category=ResourceWarning)
+                        http_request = sdc_session.get(url, verify=True, headers=headers)
+                        if http_request.status_code != 200:
+                            logging.warning("Request to MMS SDC returned HTTP status code %d", http_request.status_code)
+                            logging.warning("Text: %s", http_request.text)
+                            logging.warning("URL: %s", url)
+                            continue
+                        else:
+                            sdc_files = http_request.json()['files']
+                except requests.exceptions.ConnectionError as e:
+                    # No/bad internet connection; try loading the files locally
+                    print(e)
+                    logging.error('No internet connection!')
 
             for lvl in level:
                 for dtype in datatype:
 
                     file_found = False
+                    download_failed = False
 
-                    if user is None:
-                        url = 'https://lasp.colorado.edu/mms/sdc/public/files/api/v1/file_info/science?start_date=' + start_date + '&end_date=' + end_date + '&sc_id=mms' + prb + '&instrument_id=' + instrument + '&data_rate_mode=' + drate + '&data_level=' + lvl
-                    else:
-                        url = 'https://lasp.colorado.edu/mms/sdc/sitl/files/api/v1/file_info/science?start_date=' + start_date + '&end_date=' + end_date + '&sc_id=mms' + prb + '&instrument_id=' + instrument + '&data_rate_mode=' + drate + '&data_level=' + lvl
-                    
-                    if dtype != '':
-                        url = url + '&descriptor=' + dtype
-
-                    if CONFIG['debug_mode']: logging.info('Fetching: ' + url)
-
-                    if not no_download:
-                        # query list of available files
+                    if sdc_files is not None:
                         try:
-                            with warnings.catch_warnings():
-                                warnings.simplefilter("ignore", category=ResourceWarning)
-                                http_request = sdc_session.get(url, verify=True, headers=headers)
-                                if http_request.status_code != 200:
-                                    logging.warning("Request to MMS SDC returned HTTP status code %d", http_request.status_code)
-                                    logging.warning("Text: %s", http_request.text)
-                                    logging.warning("URL: %s", url)
-                                    continue
-                                else:
-                                    http_json = http_request.json()
-
                             if CONFIG['debug_mode']: logging.info('Filtering the results down to your trange')
 
-                            files_in_interval = mms_files_in_interval(http_json['files'], trange)
+                            group_files = [file for file in sdc_files if _sdc_file_in_group(file['file_name'], lvl, dtype)]
+                            files_in_interval = mms_files_in_interval(group_files, trange)
 
                             if available:
                                 for file in files_in_interval:
@@ -125,23 +213,29 @@ def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srv
                                     available_files.append(file['file_name'])
                                 continue
 
+                            # the part of the output directory that's the same for every file in this group
+                            if dtype == '':
+                                group_dir = os.sep.join([CONFIG['local_data_dir'], 'mms'+prb, instrument, drate, lvl])
+                            else:
+                                group_dir = os.sep.join([CONFIG['local_data_dir'], 'mms'+prb, instrument, drate, lvl, dtype])
+                            is_brst = drate.lower() == 'brst'
+
+                            to_download = []
                             for file in files_in_interval:
-                                file_date = parse(file['timetag'])
-                                if dtype == '':
-                                    out_dir = os.sep.join([CONFIG['local_data_dir'], 'mms'+prb, instrument, drate, lvl, file_date.strftime('%Y'), file_date.strftime('%m')])
-                                else:
-                                    out_dir = os.sep.join([CONFIG['local_data_dir'], 'mms'+prb, instrument, drate, lvl, dtype, file_date.strftime('%Y'), file_date.strftime('%m')])
+                                file_date = _parse_timetag(file['timetag'])
+                                out_dir = os.sep.join([group_dir, f'{file_date.year:04d}', f'{file_date.month:02d}'])
 
-                                if drate.lower() == 'brst':
-                                    out_dir = os.sep.join([out_dir, file_date.strftime('%d')])
+                                if is_brst:
+                                    out_dir = os.sep.join([out_dir, f'{file_date.day:02d}'])
 
                                 out_file = os.sep.join([out_dir, file['file_name']])
 
                                 if CONFIG['debug_mode']: logging.info('File: ' + file['file_name'] + ' / ' + file['timetag'])
 
-                                if os.path.exists(out_file) and str(os.stat(out_file).st_size) == str(file['file_size']):
+                                local_stat = _local_file_stat(out_file)
+                                if local_stat is not None and str(local_stat.st_size) == str(file['file_size']):
                                     if not download_only: logging.info('Loading ' + out_file)
-                                    out_files.append(out_file)
+                                    out_files.add(out_file)
                                     file_found = True
                                     continue
 
@@ -150,36 +244,35 @@ def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srv
                                 else:
                                     download_url = 'https://lasp.colorado.edu/mms/sdc/sitl/files/api/v1/download/science?file=' + file['file_name']
 
-                                logging.info('Downloading ' + file['file_name'] + ' to ' + out_dir)
-
-                                with warnings.catch_warnings():
-                                    warnings.simplefilter("ignore", category=ResourceWarning)
-                                    fsrc = sdc_session.get(download_url, stream=True, verify=True, headers=headers)
-                                ftmp = NamedTemporaryFile(delete=False)
-
-                                with open(ftmp.name, 'wb') as f:
-                                    copyfileobj(fsrc.raw, f)
-
-                                if not os.path.exists(out_dir):
-                                    os.makedirs(out_dir)
-
-                                # if the download was successful, copy to data directory
-                                copy(ftmp.name, out_file)
-                                out_files.append(out_file)
-                                file_found = True
-                                fsrc.close()
-                                ftmp.close()
-                                os.unlink(ftmp.name)  # delete the temporary file
+                                to_download.append((download_url, out_file, out_dir))
+
+                            if to_download:
+                                # the downloads are independent and network-bound, so overlap them
+                                with ThreadPoolExecutor(max_workers=CONFIG['max_workers']) as executor:
+                                    futures = [executor.submit(_download_one, sdc_session, download_url, out_file, out_dir, headers)
+                                               for download_url, out_file, out_dir in to_download]
+                                    # collect every download before handling failures, so that one failed file
+                                    # doesn't discard the files the other workers did download
+                                    for future in as_completed(futures):
+                                        try:
+                                            out_files.add(future.result())
+                                            file_found = True
+                                        except requests.exceptions.ConnectionError as e:
+                                            print(e)
+                                            logging.error('No internet connection!')
+                                            download_failed = True
                         except requests.exceptions.ConnectionError as e:
                             # No/bad internet connection; try loading the files locally
                             print(e)
                             logging.error('No internet connection!')
 
-                    if not file_found:
+                    # also search locally if any download failed, since other files in this group may
+                    # already have been found
+                    if not file_found or download_failed:
                         added_local_files = False
                         if not download_only:
                             logging.info('Searching for local files...')
-                            out_files.extend(mms_get_local_files(prb, instrument, drate, lvl, dtype, trange))
+                            out_files.update(mms_get_local_files(prb, instrument, drate, lvl, dtype, trange))
                             added_local_files = True
 
                         if added_local_files and CONFIG['mirror_data_dir'] is not None:
@@ -187,7 +280,7 @@ def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srv
                             # and we always copy the files from the mirror to the local data directory
                             # before trying to load into tplot variables 
                             logging.info('No local files found; checking network mirror...')
-                            out_files.extend(mms_get_local_files(prb, instrument, drate, lvl, dtype, trange, mirror=True))
+                            out_files.update(mms_get_local_files(prb, instrument, drate, lvl, dtype, trange, mirror=True))
 
     if not no_download:
         sdc_session.close()
@@ -195,9 +288,9 @@ def mms_load_data(trange=['2015-10-16', '2015-10-17'], probe='1', data_rate='srv
     if available:
         return available_files
 
-    if not download_only:
-        out_files = sorted(out_files)
+    out_files = sorted(out_files)
 
+    if not download_only:
         filtered_out_files = mms_file_filter(out_files, latest_version=latest_version, major_version=major_version, min_version=min_version, version=cdf_version)
         if not filtered_out_files:
             logging.info('No matching CDF versions found.')
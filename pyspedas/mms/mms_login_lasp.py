@@ -1,10 +1,13 @@
 from getpass import getpass
 from scipy.io import readsav
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import pickle
 import logging
 import warnings
+from .mms_config import CONFIG
 
 
 def mms_login_lasp(always_prompt=False, headers={}):
@@ -49,6 +52,14 @@ def mms_login_lasp(always_prompt=False, headers={}):
 
     session = requests.Session()
 
+    # pool connections so that the file_info queries and (concurrent) downloads reuse the same
+    # TLS connections, and retry transient connection failures
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(16, 2*CONFIG['max_workers']),
+                          max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    session.headers['Connection'] = 'keep-alive'
+
     if user != '':
         session.auth = (user, passwd)
 
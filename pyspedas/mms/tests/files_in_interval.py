@@ -0,0 +1,38 @@
+
+import unittest
+
+from ...mms.mms_files_in_interval import mms_files_in_interval
+
+TEST_DATA = [{'file_name': 'mms1_fgm_brst_l2_20151016130524_v4.18.0.cdf', 'timetag': '2015-10-16T13:05:24', 'file_size': 3},
+             {'file_name': 'mms1_fgm_brst_l2_20151016130334_v4.18.0.cdf', 'timetag': '2015-10-16T13:03:34', 'file_size': 2},
+             {'file_name': 'mms1_fgm_brst_l2_20151016130154_v4.18.0.cdf', 'timetag': '2015-10-16T13:01:54', 'file_size': 1},
+             {'file_name': 'mms1_fgm_brst_l2_20151016130714_v4.18.0.cdf', 'timetag': '2015-10-16T13:07:14', 'file_size': 4}]
+
+
+class FilesInIntervalTestCases(unittest.TestCase):
+    def test_sorted_with_extra_file(self):
+        files = mms_files_in_interval(TEST_DATA, ['2015-10-16/13:04', '2015-10-16/13:10'])
+        self.assertEqual([f['file_name'] for f in files], ['mms1_fgm_brst_l2_20151016130334_v4.18.0.cdf',
+                                                          'mms1_fgm_brst_l2_20151016130524_v4.18.0.cdf',
+                                                          'mms1_fgm_brst_l2_20151016130714_v4.18.0.cdf'])
+        self.assertEqual(files[0], {'file_name': 'mms1_fgm_brst_l2_20151016130334_v4.18.0.cdf', 'timetag': '2015-10-16T13:03:34', 'file_size': 2})
+
+    def test_start_before_first_file(self):
+        files = mms_files_in_interval(TEST_DATA, ['2015-10-16', '2015-10-17'])
+        self.assertEqual(len(files), 4)
+        self.assertEqual(files[0]['file_size'], 1)
+
+    def test_daily_and_invalid_files(self):
+        in_files = [{'file_name': 'mms1_fgm_srvy_l2_20151017_v4.18.0.cdf', 'timetag': '', 'file_size': ''},
+                    {'file_name': 'not_an_mms_file.txt', 'timetag': '', 'file_size': ''},
+                    {'file_name': 'mms1_fgm_srvy_l2_20151016_v4.18.0.cdf', 'timetag': '', 'file_size': ''}]
+        files = mms_files_in_interval(in_files, ['2015-10-16', '2015-10-17'])
+        self.assertEqual([f['file_name'] for f in files], ['mms1_fgm_srvy_l2_20151016_v4.18.0.cdf',
+                                                          'mms1_fgm_srvy_l2_20151017_v4.18.0.cdf'])
+
+    def test_no_files(self):
+        self.assertEqual(mms_files_in_interval([], ['2015-10-16', '2015-10-17']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+
+import unittest
+
+from ...mms.mms_load_data import _sdc_file_in_group
+
+
+class SDCFileInGroupTestCases(unittest.TestCase):
+    def test_no_descriptor(self):
+        self.assertTrue(_sdc_file_in_group('mms1_fgm_srvy_l2_20151016_v4.18.0.cdf', 'l2', ''))
+
+    def test_descriptor(self):
+        self.assertTrue(_sdc_file_in_group('mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf', 'l2', 'des-moms'))
+        # without a datatype, every file at the level is in the group
+        self.assertTrue(_sdc_file_in_group('mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf', 'l2', ''))
+
+    def test_descriptor_mismatch(self):
+        self.assertFalse(_sdc_file_in_group('mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf', 'l2', 'dis-moms'))
+        # files without a descriptor aren't in a datatype's group
+        self.assertFalse(_sdc_file_in_group('mms1_fgm_srvy_l2_20151016_v4.18.0.cdf', 'l2', 'des-moms'))
+
+    def test_level_mismatch(self):
+        self.assertFalse(_sdc_file_in_group('mms1_fgm_srvy_l2_20151016_v4.18.0.cdf', 'ql', ''))
+        self.assertFalse(_sdc_file_in_group('mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf', 'l1b', 'des-moms'))
+
+    def test_mixed_case(self):
+        self.assertTrue(_sdc_file_in_group('mms1_fgm_srvy_L2_20151016_v4.18.0.cdf', 'l2', ''))
+        self.assertTrue(_sdc_file_in_group('mms1_fpi_brst_l2_des-moms_20151016000000_v3.3.0.cdf', 'L2', 'DES-Moms'))
+
+    def test_invalid_file_name(self):
+        self.assertFalse(_sdc_file_in_group('not_an_mms_file.txt', 'l2', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
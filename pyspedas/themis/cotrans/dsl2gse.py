@@ -15,6 +15,85 @@ from pytplot import data_exists, del_data, store_data, get_data, set_coords, get
 from pyspedas.themis import autoload_support
 
 
+def dsl2gse_mat(time_in, spinras, spindec):
+    """Rotation matrices from DSL to GSE.
+
+    Parameters
+    ----------
+        time_in: array of float
+            Time array.
+        spinras: array of float
+            Right ascension of the spin axis (degrees), at the times in time_in.
+        spindec: array of float
+            Declination of the spin axis (degrees), at the times in time_in.
+
+    Returns
+    -------
+        Array of shape (N, 3, 3). GSE = mat @ DSL, and the transposed matrices give the GSE to DSL transform.
+
+    """
+    # Make a unit vector that points along the spin axis
+    spla = (90.0 - spindec) * np.pi / 180.0
+    splo = spinras * np.pi / 180.0
+    # spherical to cartesian
+    zscs0 = np.sin(spla) * np.cos(splo)
+    zscs1 = np.sin(spla) * np.sin(splo)
+    zscs2 = np.cos(spla)
+    znorm = np.sqrt(zscs0 * zscs0 + zscs1 * zscs1 + zscs2 * zscs2)
+    zscs0 = np.divide(zscs0, znorm)
+    zscs1 = np.divide(zscs1, znorm)
+    zscs2 = np.divide(zscs2, znorm)
+    zscs = np.column_stack((zscs0, zscs1, zscs2))
+
+    # unit vector that points along the spin axis in GSE
+    trgse = subgei2gse(time_in, zscs)
+    zgse = trgse
+    sun = [1.0, 0.0, 0.0]
+    my_y = np.cross(zgse, sun)
+    ynorm = np.sqrt(my_y[:, 0] * my_y[:, 0] + my_y[:, 1] * my_y[:, 1] + my_y[:, 2] * my_y[:, 2])
+    my_y[:, 0] = np.divide(my_y[:, 0], ynorm)
+    my_y[:, 1] = np.divide(my_y[:, 1], ynorm)
+    my_y[:, 2] = np.divide(my_y[:, 2], ynorm)
+    my_x = np.cross(my_y, zgse)
+    xnorm = np.sqrt(my_x[:, 0] * my_x[:, 0] + my_x[:, 1] * my_x[:, 1] + my_x[:, 2] * my_x[:, 2])
+    my_x[:, 0] = np.divide(my_x[:, 0], xnorm)
+    my_x[:, 1] = np.divide(my_x[:, 1], xnorm)
+    my_x[:, 2] = np.divide(my_x[:, 2], xnorm)
+
+    return np.stack((my_x, my_y, zgse), axis=2)
+
+
+def dsl2gse_arrays(time_in, data_in, spinras, spindec, isgsetodsl: bool = False):
+    """Transform DSL vectors to GSE (or GSE to DSL) without going through tplot variables.
+
+    Parameters
+    ----------
+        time_in: array of float
+            Time array.
+        data_in: array of float
+            Input vectors, shape (N, 3).
+        spinras: array of float
+            Right ascension of the spin axis (degrees), at the times in time_in.
+        spindec: array of float
+            Declination of the spin axis (degrees), at the times in time_in.
+        isgsetodsl: bool
+            If False (default) then DSL to GSE.
+            If True, then GSE to DSL.
+
+    Returns
+    -------
+        Array of shape (N, 3) with the transformed vectors.
+
+    """
+    mat = dsl2gse_mat(time_in, spinras, spindec)
+    dd = data_in[:, 0:3]
+    if not isgsetodsl:
+        # DSL -> GSE
+        return np.einsum('nij,nj->ni', mat, dd)
+    # GSE -> DSL, using the transposed (inverse) rotation
+    return np.einsum('nji,nj->ni', mat, dd)
+
+
 def dsl2gse(name_in: str, name_out: str, isgsetodsl: bool = False, ignore_input_coord: bool = False,
             probe: str=None, use_spinaxis_corrections: bool=True) -> int:
     """Transform dsl to gse.
@@ -97,61 +176,8 @@ def dsl2gse(name_in: str, name_out: str, isgsetodsl: bool = False, ignore_input_
     data_ras = get_data(hiras_name)
     data_dec = get_data(hidec_name)
 
-    # Make a unit vector that points along the spin axis
-    spla = (90.0 - (data_dec[1])) * np.pi / 180.0
-    splo = data_ras[1] * np.pi / 180.0
-    # spherical to cartesian
-    zscs0 = np.sin(spla) * np.cos(splo)
-    zscs1 = np.sin(spla) * np.sin(splo)
-    zscs2 = np.cos(spla)
-    znorm = np.sqrt(zscs0 * zscs0 + zscs1 * zscs1 + zscs2 * zscs2)
-    zscs0 = np.divide(zscs0, znorm)
-    zscs1 = np.divide(zscs1, znorm)
-    zscs2 = np.divide(zscs2, znorm)
-    zscs = np.column_stack((zscs0, zscs1, zscs2))
-
-    # unit vector that points along the spin axis in GSE
-    trgse = subgei2gse(data_in[0], zscs)
-    zgse = trgse
-    sun = [1.0, 0.0, 0.0]
-    my_y = np.cross(zgse, sun)
-    ynorm = np.sqrt(my_y[:, 0] * my_y[:, 0] + my_y[:, 1] * my_y[:, 1] + my_y[:, 2] * my_y[:, 2])
-    my_y[:, 0] = np.divide(my_y[:, 0], ynorm)
-    my_y[:, 1] = np.divide(my_y[:, 1], ynorm)
-    my_y[:, 2] = np.divide(my_y[:, 2], ynorm)
-    my_x = np.cross(my_y, zgse)
-    xnorm = np.sqrt(my_x[:, 0] * my_x[:, 0] + my_x[:, 1] * my_x[:, 1] + my_x[:, 2] * my_x[:, 2])
-    my_x[:, 0] = np.divide(my_x[:, 0], xnorm)
-    my_x[:, 1] = np.divide(my_x[:, 1], xnorm)
-    my_x[:, 2] = np.divide(my_x[:, 2], xnorm)
-
-    yscs = np.column_stack((zgse[:, 1] * sun[2] - zgse[:, 2] * sun[1],
-                            zgse[:, 2] * sun[0] - zgse[:, 0] * sun[2],
-                            zgse[:, 0] * sun[1] - zgse[:, 1] * sun[0]))
-    # yscs_norm = np.sqrt(yscs[:,0] ** 2.0 + yscs[:,1] ** 2.0 + yscs[:,2] ** 2.0)
-    # yscs = np.divide(yscs, yscs_norm)
-    xscs = np.column_stack((yscs[:, 1] * zgse[:, 2] - yscs[:, 2] * zgse[:, 1],
-                            yscs[:, 2] * zgse[:, 0] - yscs[:, 0] * zgse[:, 2],
-                            yscs[:, 0] * zgse[:, 1] - yscs[:, 1] * zgse[:, 0]))
-
-    if not isgsetodsl:
-        # DSL -> GSE
-        dd = data_in[1]
-        d0 = dd[:, 0] * my_x[:, 0] + dd[:, 1] * my_y[:, 0] + dd[:, 2] * zgse[:, 0]
-        d1 = dd[:, 0] * my_x[:, 1] + dd[:, 1] * my_y[:, 1] + dd[:, 2] * zgse[:, 1]
-        d2 = dd[:, 0] * my_x[:, 2] + dd[:, 1] * my_y[:, 2] + dd[:, 2] * zgse[:, 2]
-        out_coord = 'GSE'
-
-    else:
-        # GSE -> DSL
-        dd = data_in[1]
-        d0 = dd[:, 0] * my_x[:, 0] + dd[:, 1] * my_x[:, 1] + dd[:, 2] * my_x[:, 2]
-        d1 = dd[:, 0] * my_y[:, 0] + dd[:, 1] * my_y[:, 1] + dd[:, 2] * my_y[:, 2]
-        d2 = dd[:, 0] * zgse[:, 0] + dd[:, 1] * zgse[:, 1] + dd[:, 2] * zgse[:, 2]
-        out_coord = 'DSL'
-
-    dd_out = [d0, d1, d2]
-    data_out = np.column_stack(dd_out)
+    data_out = dsl2gse_arrays(data_in[0], data_in[1], data_ras[1], data_dec[1], isgsetodsl=isgsetodsl)
+    out_coord = 'DSL' if isgsetodsl else 'GSE'
 
     store_data(name_out, data={'x': data_in[0], 'y': data_out}, attr_dict=meta_copy)
     set_coords(name_out, out_coord)
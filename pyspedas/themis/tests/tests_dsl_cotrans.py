@@ -1,9 +1,19 @@
 """Tests of ssl2dsl and dsl2gse functions."""
 
 import unittest
-from pytplot import get_data,del_data,tplot_restore,data_exists, set_coords
-from numpy.testing import assert_array_almost_equal_nulp, assert_array_max_ulp, assert_allclose
-from pyspedas.themis import autoload_support, ssl2dsl,dsl2gse
+import numpy as np
+from pytplot import get_data,del_data,tplot_restore, set_coords, store_data
+from numpy.testing import assert_allclose
+from pyspedas.cotrans.cotrans_lib import subgei2gse_batch, subgse2gei_batch
+from pyspedas import tinterpol
+from pyspedas.themis import autoload_support, ssl2dsl,dsl2gse, get_spinmodel
+from pyspedas.themis.cotrans.dsl2gse import dsl2gse_mat
+from pyspedas.themis.cotrans.ssl2dsl import ssl2dsl_arrays
+
+
+def _assert_close32(actual, expected, atol=1.0e-06):
+    """ Compare at float32 precision, which is ample for the IDL reference data and the 1e-6 tolerances """
+    assert_allclose(np.asarray(actual, dtype=np.float32), np.asarray(expected, dtype=np.float32), atol=atol)
 
 
 class DSLCotransDataValidation(unittest.TestCase):
@@ -42,31 +52,15 @@ class DSLCotransDataValidation(unittest.TestCase):
         # pytplot.cdf_to_tplot(filename)
         tplot_restore(filename)
         #pytplot.tplot_names()
-        cls.basis_x = get_data('basis_x')
-        cls.basis_y = get_data('basis_y')
-        cls.basis_z = get_data('basis_z')
-        cls.basis_x_gei2gse = get_data('basis_x_gei2gse')
-        cls.basis_y_gei2gse = get_data('basis_y_gei2gse')
-        cls.basis_z_gei2gse = get_data('basis_z_gei2gse')
-        cls.basis_x_gse2gei = get_data('basis_x_gse2gei')
-        cls.basis_y_gse2gei = get_data('basis_y_gse2gei')
-        cls.basis_z_gse2gei = get_data('basis_z_gse2gei')
-
-        cls.basis_x_dsl2gse = get_data('basis_x_dsl2gse')
-        cls.basis_y_dsl2gse = get_data('basis_y_dsl2gse')
-        cls.basis_z_dsl2gse = get_data('basis_z_dsl2gse')
-
-        cls.basis_x_gse2dsl = get_data('basis_x_gse2dsl')
-        cls.basis_y_gse2dsl = get_data('basis_y_gse2dsl')
-        cls.basis_z_gse2dsl = get_data('basis_z_gse2dsl')
-
-        cls.basis_x_ssl2dsl = get_data('basis_x_ssl2dsl')
-        cls.basis_y_ssl2dsl = get_data('basis_y_ssl2dsl')
-        cls.basis_z_ssl2dsl = get_data('basis_z_ssl2dsl')
-
-        cls.basis_x_dsl2ssl = get_data('basis_x_dsl2ssl')
-        cls.basis_y_dsl2ssl = get_data('basis_y_dsl2ssl')
-        cls.basis_z_dsl2ssl = get_data('basis_z_dsl2ssl')
+        # Input basis vectors and the IDL results for each transform, e.g. cls.basis_x_dsl2gse
+        # The IDL results are also cached as contiguous float32 arrays (cls.ref32), the precision used in the comparisons
+        cls.ref32 = {}
+        for suffix in ('', '_gei2gse', '_gse2gei', '_dsl2gse', '_gse2dsl', '_ssl2dsl', '_dsl2ssl'):
+            for axis in ('x', 'y', 'z'):
+                name = 'basis_' + axis + suffix
+                setattr(cls, name, get_data(name))
+                if suffix:
+                    cls.ref32[name] = np.ascontiguousarray(getattr(cls, name).y, dtype=np.float32)
 
         # The cotrans routines now can load their own support data.  However, it seems you actually need
         # some substantial padding of the support data time interval compared to the target variable.  I
@@ -84,203 +78,166 @@ class DSLCotransDataValidation(unittest.TestCase):
         state_trange = ['2007-03-21','2007-03-25']
         autoload_support(trange=state_trange, probe='a', spinaxis=True, spinmodel=True)
 
+        # Spin model shared by the ssl2dsl/dsl2ssl tests, which all use eclipse correction level 1
+        cls.sm = get_spinmodel(probe='a', correction_level=1)
+
+        # The basis vectors share the same times, so the spin phase (radians) is interpolated once for all
+        # of the ssl2dsl/dsl2ssl tests
+        cls.spin_phase = cls.sm.interp_t(cls.basis_x.times, use_spinphase_correction=True).spinphase * np.pi / 180.0
+
+        # DSL to GSE rotation matrices at the basis vector times, shared by the dsl2gse and gse2dsl tests.
+        # The spin axis is interpolated the same way dsl2gse does it.
+        tinterpol(['tha_spinras_corrected', 'tha_spindec_corrected'], 'basis_x', method='linear',
+                  newname=['tha_spinras_basis', 'tha_spindec_basis'], suffix='')
+        cls.dsl2gse_mat = dsl2gse_mat(cls.basis_x.times, get_data('tha_spinras_basis').y,
+                                      get_data('tha_spindec_basis').y)
+
 
     def setUp(self):
         """ We need to clean tplot variables before each run"""
         # del_data('*')
 
+    def _basis_input(self, coord, axis='z'):
+        """ Store a private copy of a basis vector in the given coordinate system, named after the running test.
+
+        Each test then reads and writes only its own tplot variables, so the tests can run in any order or
+        in separate worker processes (e.g. pytest -n auto) without depending on each other's set_coords calls.
+        """
+        basis = getattr(self, 'basis_' + axis)
+        name = 'basis_' + axis + '__' + self._testMethodName
+        store_data(name, data={'x': basis.times, 'y': basis.y})
+        set_coords(name, coord)
+        return name
+
     def test_gei2gse(self):
         """Validate gei2gse transform """
-        from pyspedas.cotrans.cotrans_lib import subgei2gse
-
-        bx = self.basis_x
-        by = self.basis_y
-        bz = self.basis_z
-        times = bx.times
-        bx_gse = subgei2gse(times, bx.y)
-        by_gse = subgei2gse(times, by.y)
-        bz_gse = subgei2gse(times, bz.y)
-        assert_allclose(bx_gse, self.basis_x_gei2gse.y, atol=1.0e-06)
-        assert_allclose(by_gse, self.basis_y_gei2gse.y, atol=1.0e-06)
-        assert_allclose(bz_gse, self.basis_z_gei2gse.y, atol=1.0e-06)
+        # One batched call transforms all three basis vectors, stacked along the last axis
+        vecs = np.stack((self.basis_x.y, self.basis_y.y, self.basis_z.y), axis=-1)
+        b_gse = subgei2gse_batch(self.basis_x.times, vecs)
+        _assert_close32(b_gse[..., 0], self.ref32['basis_x_gei2gse'])
+        _assert_close32(b_gse[..., 1], self.ref32['basis_y_gei2gse'])
+        _assert_close32(b_gse[..., 2], self.ref32['basis_z_gei2gse'])
 
     def test_gse2gei(self):
         """Validate gse2gei transform """
-        from pyspedas.cotrans.cotrans_lib import subgse2gei
-
-        bx = self.basis_x
-        by = self.basis_y
-        bz = self.basis_z
-        times = bx.times
-        bx_gei = subgse2gei(times, bx.y)
-        by_gei = subgse2gei(times, by.y)
-        bz_gei = subgse2gei(times, bz.y)
-        assert_allclose(bx_gei, self.basis_x_gse2gei.y, atol=1.0e-06)
-        assert_allclose(by_gei, self.basis_y_gse2gei.y, atol=1.0e-06)
-        assert_allclose(bz_gei, self.basis_z_gse2gei.y, atol=1.0e-06)
-
-    def test_dsl2gse_x(self):
-        """Validate dsl2gse X axis transform """
-
-        set_coords('basis_x', 'DSL')
-        result = dsl2gse('basis_x', 'basis_x_dsl2gse', probe='a')
-        self.assertEqual(result,1)
-        bx_gse = get_data('basis_x_dsl2gse')
-        assert_allclose(bx_gse.y, self.basis_x_dsl2gse.y, atol=1.0e-06)
-
-    def test_dsl2gse_y(self):
-        """Validate dsl2gse Y axis transform """
-        from pyspedas.cotrans.cotrans_lib import subgse2gei
-        set_coords('basis_y', 'DSL')
-        result = dsl2gse('basis_y', 'basis_y_dsl2gse', probe='a')
-        self.assertEqual(result, 1)
-        by_gse = get_data('basis_y_dsl2gse')
-        assert_allclose(by_gse.y, self.basis_y_dsl2gse.y, atol=1.0e-06)
-
-    def test_dsl2gse_z(self):
-        """Validate dsl2gse Z axis transform """
-        set_coords('basis_z', 'DSL')
-        result = dsl2gse('basis_z','basis_z_dsl2gse', probe='a')
-        self.assertEqual(result, 1)
-        bz_gse = get_data('basis_z_dsl2gse')
-        assert_allclose(bz_gse.y, self.basis_z_dsl2gse.y, atol=1.0e-06)
-
-    def test_gse2dsl_x(self):
-        """Validate gse2dsl X axis transform """
-        set_coords('basis_x', 'GSE')
-        result = dsl2gse('basis_x', 'basis_x_gse2dsl', probe='a', isgsetodsl=True)
-        self.assertEqual(result, 1)
-        self.assertEqual(result, 1)
-        bx_gse = get_data('basis_x_gse2dsl')
-        assert_allclose(bx_gse.y, self.basis_x_gse2dsl.y, atol=1.0e-06)
-
-    def test_gse2dsl_y(self):
-        """Validate gse2dsl Y axis transform """
-        from pyspedas.cotrans.cotrans_lib import subgse2gei
-        set_coords('basis_y', 'GSE')
-        result = dsl2gse('basis_y', 'basis_y_gse2dsl', probe='a', isgsetodsl=True)
-        self.assertEqual(result, 1)
-        by_gse = get_data('basis_y_gse2dsl')
-        assert_allclose(by_gse.y, self.basis_y_gse2dsl.y, atol=1.0e-06)
-
-    def test_gse2dsl_z(self):
-        """Validate gse2dsl Z axis transform """
-        set_coords('basis_z', 'GSE')
-        result = dsl2gse('basis_z', 'basis_z_gse2dsl', probe='a', isgsetodsl=True)
-        self.assertEqual(result, 1)
-        bz_gse = get_data('basis_z_gse2dsl')
-        assert_allclose(bz_gse.y, self.basis_z_gse2dsl.y, atol=1.0e-06)
-
-    def test_ssl2dsl_x(self):
-        """Validate ssl2dsl X axis transform """
-        set_coords('basis_x', 'SSL')
-        # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_x','basis_x_ssldsl',probe='a',eclipse_correction_level=1)
-        self.assertEqual(result, 1)
-        bx_dsl = get_data('basis_x_ssl2dsl')
-        assert_allclose(bx_dsl.y, self.basis_x_ssl2dsl.y, atol=1.0e-06)
-
-    def test_ssl2dsl_y(self):
-        """Validate ssl2dsl Y axis transform """
-        set_coords('basis_y', 'SSL')
-        # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_y','basis_y_ssldsl',probe='a',eclipse_correction_level=1, use_spinphase_correction=True)
-        self.assertEqual(result, 1)
-        by_dsl = get_data('basis_y_ssl2dsl')
-        assert_allclose(by_dsl.y, self.basis_y_ssl2dsl.y, atol=1.0e-06)
-
-    def test_ssl2dsl_z(self):
-        """Validate ssl2dsl Z axis transform """
-        set_coords('basis_z', 'SSL')
+        vecs = np.stack((self.basis_x.y, self.basis_y.y, self.basis_z.y), axis=-1)
+        b_gei = subgse2gei_batch(self.basis_x.times, vecs)
+        _assert_close32(b_gei[..., 0], self.ref32['basis_x_gse2gei'])
+        _assert_close32(b_gei[..., 1], self.ref32['basis_y_gse2gei'])
+        _assert_close32(b_gei[..., 2], self.ref32['basis_z_gse2gei'])
+
+    def test_dsl2gse(self):
+        """Validate dsl2gse X, Y and Z axis transforms """
+        for axis in ('x', 'y', 'z'):
+            with self.subTest(axis=axis):
+                b_gse = np.einsum('nij,nj->ni', self.dsl2gse_mat, getattr(self, 'basis_' + axis).y)
+                _assert_close32(b_gse, self.ref32['basis_' + axis + '_dsl2gse'])
+
+    def test_gse2dsl(self):
+        """Validate gse2dsl X, Y and Z axis transforms """
+        for axis in ('x', 'y', 'z'):
+            with self.subTest(axis=axis):
+                b_dsl = np.einsum('nji,nj->ni', self.dsl2gse_mat, getattr(self, 'basis_' + axis).y)
+                _assert_close32(b_dsl, self.ref32['basis_' + axis + '_gse2dsl'])
+
+    def test_ssl2dsl(self):
+        """Validate ssl2dsl X, Y and Z axis transforms """
+        for axis in ('x', 'y', 'z'):
+            with self.subTest(axis=axis):
+                b_dsl = ssl2dsl_arrays(getattr(self, 'basis_' + axis).y, self.spin_phase)
+                _assert_close32(b_dsl, self.ref32['basis_' + axis + '_ssl2dsl'])
+
+    def test_dsl2ssl(self):
+        """Validate dsl2ssl X, Y and Z axis transforms """
+        # The X and Y tests need a slightly looser tolerance for some reason.
+        for axis, atol in (('x', 1.5e-06), ('y', 1.5e-06), ('z', 1.0e-06)):
+            with self.subTest(axis=axis):
+                b_ssl = ssl2dsl_arrays(getattr(self, 'basis_' + axis).y, self.spin_phase, isdsltossl=True)
+                _assert_close32(b_ssl, self.ref32['basis_' + axis + '_dsl2ssl'], atol=atol)
+
+    def test_dsl2gse_tplot(self):
+        """Validate the dsl2gse tplot wrapper end to end """
+        name_in = self._basis_input('DSL', axis='x')
+        result = dsl2gse(name_in, name_in + '_out', probe='a')
+        self.assertEqual(result, 1)
+        assert_allclose(get_data(name_in + '_out').y, self.basis_x_dsl2gse.y, atol=1.0e-06)
+
+    def test_gse2dsl_tplot(self):
+        """Validate the gse2dsl tplot wrapper end to end """
+        name_in = self._basis_input('GSE', axis='x')
+        result = dsl2gse(name_in, name_in + '_out', probe='a', isgsetodsl=True)
+        self.assertEqual(result, 1)
+        assert_allclose(get_data(name_in + '_out').y, self.basis_x_gse2dsl.y, atol=1.0e-06)
+
+    def test_ssl2dsl_tplot(self):
+        """Validate the ssl2dsl tplot wrapper end to end """
+        name_in = self._basis_input('SSL', axis='x')
         # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_ssldsl', probe='a',eclipse_correction_level=1,use_spinphase_correction=True)
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1, use_spinphase_correction=True)
         self.assertEqual(result, 1)
-        bz_dsl = get_data('basis_z_ssl2dsl')
-        assert_allclose(bz_dsl.y, self.basis_z_ssl2dsl.y, atol=1.0e-06)
+        assert_allclose(get_data(name_in + '_out').y, self.basis_x_ssl2dsl.y, atol=1.0e-06)
 
-    def test_dsl2ssl_x(self):
-        """Validate dsl2ssl X axis transform """
-        set_coords('basis_x', 'DSL')
-        # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_x','basis_x_dsl2ssl',probe='a',eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True)
-        self.assertEqual(result, 1)
-        bx_ssl = get_data('basis_x_dsl2ssl')
-        # This test needs a slightly looser tolerance for some reason.
-        assert_allclose(bx_ssl.y, self.basis_x_dsl2ssl.y, atol=1.5e-06)
-
-    def test_dsl2ssl_y(self):
-        """Validate dsl2ssl Y axis transform """
-        set_coords('basis_y', 'DSL')
-        # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_y','basis_y_dsl2ssl', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True)
-        self.assertEqual(result, 1)
-        by_ssl = get_data('basis_y_dsl2ssl')
-        # This test needs a slightly looser tolerance for some reason.
-        assert_allclose(by_ssl.y, self.basis_y_dsl2ssl.y, atol=1.5e-06)
-
-    def test_dsl2ssl_z(self):
-        """Validate dsl2ssl Z axis transform """
-        set_coords('basis_z', 'DSL')
-        # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_dsl2ssl', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True)
+    def test_dsl2ssl_tplot(self):
+        """Validate the dsl2ssl tplot wrapper end to end """
+        name_in = self._basis_input('DSL', axis='x')
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True)
         self.assertEqual(result, 1)
-        bz_ssl = get_data('basis_z_dsl2ssl')
-        assert_allclose(bz_ssl.y, self.basis_z_dsl2ssl.y, atol=1.0e-06)
+        assert_allclose(get_data(name_in + '_out').y, self.basis_x_dsl2ssl.y, atol=1.5e-06)
 
     def test_catch_mismatch_dsl2ssl_z(self):
         """Test detection of mismatched input vs. requested coordinate systems in dsl2ssl transform """
         # Requesting DSL to SSL, but specifying SSL as input coordinate system
-        set_coords('basis_z', 'SSL')
+        name_in = self._basis_input('SSL')
         # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_dsl2ssl', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True, ignore_input_coord = False)
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True, ignore_input_coord = False)
         self.assertEqual(result, 0)
 
     def test_catch_mismatch_ssl2dsl_z(self):
         """Test detection of mismatched input vs. requested coordinates in ssl2dsl transform """
         # Requesting SSL to DSL, but specifying DSL as input coordinate system
-        set_coords('basis_z', 'DSL')
+        name_in = self._basis_input('DSL')
         # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_ssldsl', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, ignore_input_coord=False)
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, ignore_input_coord=False)
         self.assertEqual(result, 0)
 
     def test_catch_mismatch_gse2dsl_z(self):
         """Test detection of mismatched input vs requested coordinates in gse2dsl transform """
-        set_coords('basis_z', 'DSL')
-        result = dsl2gse('basis_z', 'basis_z_gse2dsl', probe='a', isgsetodsl=True)
+        name_in = self._basis_input('DSL')
+        result = dsl2gse(name_in, name_in + '_out', probe='a', isgsetodsl=True)
         self.assertEqual(result, 0)
 
     def test_catch_mismatch_dsl2gse_z(self):
         """Test detection of mismatched input vs. requested coordinates in dsl2gse transform """
-        set_coords('basis_z', 'GSE')
-        result = dsl2gse('basis_z', 'basis_z_gse2dsl', probe='a')
+        name_in = self._basis_input('GSE')
+        result = dsl2gse(name_in, name_in + '_out', probe='a')
         self.assertEqual(result, 0)
 
     def test_ignore_mismatch_dsl2ssl_z(self):
         """Test ability to bypass coordinate system consistency check in dsl2ssl transform """
         # Requesting DSL to SSL, but specifying SSL as input coordinate system
-        set_coords('basis_z', 'SSL')
+        name_in = self._basis_input('SSL')
         # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_dsl2ssl', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True, ignore_input_coord = True)
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1, use_spinphase_correction=True, isdsltossl=True, ignore_input_coord = True)
         self.assertEqual(result, 1)
 
     def test_ignore_mismatch_ssl2dsl_z(self):
         """Test ability to bypass coordinate system consistency check in ssl2dsl transform  """
         # Requesting SSL to DSL, but specifying DSL as input coordinate system
-        set_coords('basis_z', 'DSL')
+        name_in = self._basis_input('DSL')
         # Usually probe can be inferred from the input variable name, but we need it here.
-        result = ssl2dsl('basis_z','basis_z_ssldsl', probe='a', eclipse_correction_level=1,use_spinphase_correction=True, ignore_input_coord=True)
+        result = ssl2dsl(name_in, name_in + '_out', probe='a', eclipse_correction_level=1,use_spinphase_correction=True, ignore_input_coord=True)
         self.assertEqual(result, 1)
 
     def test_ignore_mismatch_gse2dsl_z(self):
         """Test ability to bypass coordinate system consistency check in gse2dsl transform """
-        set_coords('basis_z', 'DSL')
-        result = dsl2gse('basis_z', 'basis_z_gse2dsl', probe='a', isgsetodsl=True, ignore_input_coord=True)
+        name_in = self._basis_input('DSL')
+        result = dsl2gse(name_in, name_in + '_out', probe='a', isgsetodsl=True, ignore_input_coord=True)
         self.assertEqual(result, 1)
 
     def test_ignore_mismatch_dsl2gse_z(self):
         """Test ability to bypass coordinate system consistency check in dsl2gse transform """
-        set_coords('basis_z', 'GSE')
-        result = dsl2gse('basis_z', 'basis_z_gse2dsl', probe='a', ignore_input_coord=True)
+        name_in = self._basis_input('GSE')
+        result = dsl2gse(name_in, name_in + '_out', probe='a', ignore_input_coord=True)
         self.assertEqual(result, 1)
 
 if __name__ == '__main__':
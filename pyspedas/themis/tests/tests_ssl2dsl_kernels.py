@@ -0,0 +1,68 @@
+""" Tests of the optional numba/numexpr rotation kernels in ssl2dsl """
+import sys
+import unittest
+from importlib.util import find_spec
+from unittest import mock
+import numpy as np
+from numpy.testing import assert_allclose
+import pyspedas.themis.cotrans.ssl2dsl
+
+# the package re-exports the ssl2dsl function under the module's name, so get the module itself
+ssl2dsl_mod = sys.modules['pyspedas.themis.cotrans.ssl2dsl']
+
+
+def numpy_rotation(data_in, phase, isdsltossl):
+    """ Reference rotation, written out directly in NumPy """
+    if isdsltossl:
+        phase = -phase
+    d0, d1, d2 = data_in[:, 0], data_in[:, 1], data_in[:, 2]
+    return np.column_stack((d0 * np.cos(phase) - d1 * np.sin(phase),
+                            d0 * np.sin(phase) + d1 * np.cos(phase),
+                            d2))
+
+
+class SSL2DSLKernelTests(unittest.TestCase):
+    """
+    ssl2dsl_arrays picks a numba, numexpr or plain NumPy kernel depending on what's installed,
+    so force each one in turn and compare it with the NumPy reference.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(42)
+        cls.data = rng.normal(size=(1000, 3)) * 100.0
+        cls.phase = rng.uniform(0.0, 2.0 * np.pi, 1000)
+
+    def check_kernel(self):
+        for isdsltossl in (False, True):
+            for dtype, rtol, atol in ((np.float64, 1e-12, 1e-10), (np.float32, 1e-5, 1e-3)):
+                with self.subTest(isdsltossl=isdsltossl, dtype=dtype):
+                    data = self.data.astype(dtype)
+                    phase = self.phase.astype(dtype)
+                    out = ssl2dsl_mod.ssl2dsl_arrays(data, phase, isdsltossl=isdsltossl)
+                    self.assertEqual(out.dtype, dtype)
+                    self.assertEqual(out.shape, data.shape)
+                    assert_allclose(out, numpy_rotation(self.data, self.phase, isdsltossl), rtol=rtol, atol=atol)
+
+    def test_numpy(self):
+        with mock.patch.object(ssl2dsl_mod, '_NUMBA_KERNELS', False), mock.patch.object(ssl2dsl_mod, 'ne', None):
+            self.check_kernel()
+
+    @unittest.skipIf(ssl2dsl_mod.ne is None, 'numexpr is not installed')
+    def test_numexpr(self):
+        with mock.patch.object(ssl2dsl_mod, '_NUMBA_KERNELS', False):
+            self.check_kernel()
+
+    @unittest.skipIf(find_spec('numba') is None, 'numba is not installed')
+    def test_numba(self):
+        with mock.patch.object(ssl2dsl_mod, '_NUMBA_MIN_SIZE', 0):
+            self.check_kernel()
+        self.assertTrue(ssl2dsl_mod._NUMBA_KERNELS)
+
+    def test_roundtrip(self):
+        dsl = ssl2dsl_mod.ssl2dsl_arrays(self.data, self.phase)
+        assert_allclose(ssl2dsl_mod.ssl2dsl_arrays(dsl, self.phase, isdsltossl=True), self.data, rtol=1e-12, atol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,17 +2,157 @@
 Displays location of source files, one line of documentation and the function name based on the request
 """
 
+import contextlib
 import importlib
 import inspect
-import itertools
+import os
 import pkgutil
 import sys
-import io
 from fnmatch import fnmatchcase
 
 import pytplot
 import pyspedas
 
+# Names of the package and all of its subpackages, keyed by package name. The module tree does not
+# change within a session, so the walk is done once per package and reused by later libs() calls
+_PACKAGE_MOD_CACHE = {}
+
+# Modules that failed to import; the error is reported once and the import is not retried
+_IMPORT_FAIL_CACHE = set()
+
+# inspect.getsourcefile results keyed by code object file name; all the functions compiled from one file
+# share the same source file, so the filesystem checks are done once per file
+_SOURCE_FILE_CACHE = {}
+
+# Every function found under a package, keyed by package name, so that repeated libs() searches in a session
+# only scan this list instead of the modules (see _function_index)
+_FUNCTION_INDEX = {}
+
+# Subpackages that never need to be searched: pytplot.QtPlotter fails to import without Qt, and the
+# tests/examples packages contain no user-facing functions
+_SKIP_NAMES = frozenset(('qtplotter', 'tests', 'examples'))
+
+
+class _NullIO:
+    """
+    Stdout replacement that discards everything written to it, used to silence module imports
+    """
+    def write(self, s):
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+_NULL_IO = _NullIO()
+
+
+def libs_cache_clear():
+    """
+    Clears the cached package walk, function index and failed imports used by libs(), e.g. after installing
+    or editing modules in a running session
+    """
+    _PACKAGE_MOD_CACHE.clear()
+    _IMPORT_FAIL_CACHE.clear()
+    _SOURCE_FILE_CACHE.clear()
+    _FUNCTION_INDEX.clear()
+
+
+def _walk_package(package):
+    """
+    Returns the cached list of names of the package itself and all of its subpackages. The package directories
+    are listed without importing anything, and the _SKIP_NAMES subpackages are pruned along with everything below them
+    """
+    mod_list = _PACKAGE_MOD_CACHE.get(package.__name__)
+    if mod_list is None:
+        mod_list = [package.__name__]
+
+        def walk(path, prefix):
+            for finder, modname, ispkg in pkgutil.iter_modules(path, prefix):
+                name = modname[len(prefix):]
+                if not ispkg or name.lower() in _SKIP_NAMES:
+                    continue
+                mod_list.append(modname)
+                finder_path = getattr(finder, 'path', None)
+                if finder_path is not None:
+                    walk([os.path.join(finder_path, name)], modname + '.')
+
+        # Plain modules have no __path__, so only the module itself is searched
+        walk(getattr(package, '__path__', []), package.__name__ + '.')
+        _PACKAGE_MOD_CACHE[package.__name__] = mod_list
+    return mod_list
+
+
+def _safe_import(modname):
+    """
+    Imports a module, returning None on success or the error message if it raises. Besides ImportError,
+    some modules raise other errors at import time (e.g. geopack without its IGRF coefficient files)
+    """
+    try:
+        importlib.import_module(modname)
+    except Exception as e:
+        _IMPORT_FAIL_CACHE.add(modname)
+        return f"Error importing module {modname}: {e}"
+    return None
+
+
+def _function_index(package):
+    """
+    Returns the cached list of (name, full_name, function) for every function found in the package and its
+    subpackages, building it on first use. Only functions defined within the package itself are included.
+    The list is in the order libs() prints its results: by module, then alphabetically by name
+    """
+    index = _FUNCTION_INDEX.get(package.__name__)
+    if index is not None:
+        return index
+
+    modnames = _walk_package(package)
+
+    # Import anything not yet in sys.modules, with one stdout redirect around the whole pass
+    # to silence import-time output. Errors are collected and reported once stdout is restored
+    to_import = [modname for modname in modnames
+                 if modname not in sys.modules and modname not in _IMPORT_FAIL_CACHE]
+    with contextlib.redirect_stdout(_NULL_IO):
+        import_errors = [_safe_import(modname) for modname in to_import]
+
+    for error_message in import_errors:
+        if error_message:
+            print(error_message)
+
+    index = []
+    for modname in modnames:
+        module = sys.modules.get(modname)
+        if module is None:
+            continue
+        module_dict = vars(module)
+        for name in sorted(module_dict):
+            obj = module_dict[name]
+            if inspect.isfunction(obj) and (package.__name__ in obj.__module__):
+                index.append((name, modname + '.' + name, obj))
+    _FUNCTION_INDEX[package.__name__] = index
+    return index
+
+
+def _format_function(full_name, obj):
+    """
+    Returns the name, source file and first line of documentation of a matched function, as printed by libs()
+    """
+    code_file = obj.__code__.co_filename
+    try:
+        source_file = _SOURCE_FILE_CACHE[code_file]
+    except KeyError:
+        try:
+            source_file = inspect.getsourcefile(obj)
+        except TypeError:
+            source_file = None
+        _SOURCE_FILE_CACHE[code_file] = source_file
+    doc = inspect.getdoc(obj)
+    first_line_of_doc = doc.split('\n')[0] if doc else "No documentation"
+    return f"Function: {full_name}\nLocation: {source_file}\nDocumentation: {first_line_of_doc}\n\n"
+
 
 def libs(function_name, package=None):
     """
@@ -29,13 +169,15 @@ def libs(function_name, package=None):
       Default is the pyspedas package. This should be a Python module object.
 
     Note:
-    - All submodules of pyspedas and pytplot are imported during the search. The package option is
-      simply narrows the search.
+    - All subpackages of pyspedas and pytplot are imported during the search. If the package option
+      is given, only that package and its subpackages are imported and searched.
+    - The functions found are indexed on the first search of each package, so later searches in the
+      same session only scan the index. Call libs_cache_clear() to rebuild it.
     - The function specifically searches for functions, not classes or other objects.
     - If multiple functions with the same name exist in different modules within the package,
       it will list them all.
-    - The function handles ImportError exceptions by printing an error message and
-      continuing the search, except 'pytplot.QtPlotter'. pytplot.QtPlotter results in error during import and ignored
+    - The function handles import errors by printing an error message once per session and
+      continuing the search. pytplot.QtPlotter and the tests/examples subpackages are skipped.
 
     Example Usage:
 
@@ -49,70 +191,23 @@ def libs(function_name, package=None):
     if not function_name:
         return
 
-    # Using separate functions for the wildcard and substring matching eliminates a test and branch in the inner loop
-
-    def list_functions_substring(module, root, search_string, pacakge_obj):
-        full_module_name = module.__name__
-        for name, obj in inspect.getmembers(module):
-            if inspect.isfunction(obj) and (search_string in name) and (pacakge_obj.__name__ in obj.__module__):
-                full_name = full_module_name + '.' + name
-                source_file = inspect.getsourcefile(obj)
-                doc = inspect.getdoc(obj)
-                first_line_of_doc = doc.split('\n')[0] if doc else "No documentation"
-                print(f"Function: {full_name}\nLocation: {source_file}\nDocumentation: {first_line_of_doc}\n")
-
-    def list_functions_wildcard(module, root, wildcard_pattern, pacakge_obj):
-        full_module_name = module.__name__
-        for name, obj in inspect.getmembers(module):
-            if inspect.isfunction(obj) and fnmatchcase(name.lower(), wildcard_pattern) and (pacakge_obj.__name__ in obj.__module__):
-                full_name = full_module_name + '.' + name
-                source_file = inspect.getsourcefile(obj)
-                doc = inspect.getdoc(obj)
-                first_line_of_doc = doc.split('\n')[0] if doc else "No documentation"
-                print(f"Function: {full_name}\nLocation: {source_file}\nDocumentation: {first_line_of_doc}\n")
-
-    def traverse_modules(package, function_name, package_obj):
-        # Add the module itself
-        walk_packages_iterator = pkgutil.walk_packages(path=package.__path__, prefix=package.__name__ + '.')
-        combined_iterator = itertools.chain(((None, package.__name__, True),), walk_packages_iterator)
-
-        # Check for wildcard characters
-        if '*' in function_name or '?' in function_name:
-            wildcard=True
-            # There is no 'fnmatchnocase', so lowercase the search pattern and function names before comparing
-            # We'll add implicit leading and trailing '*', so any substring match will appear in the list
-            wildcard_pattern = '*' + function_name.lower() + '*'
+    # Check for wildcard characters
+    if '*' in function_name or '?' in function_name:
+        # There is no 'fnmatchnocase', so lowercase the search pattern and function names before comparing
+        # We'll add implicit leading and trailing '*', so any substring match will appear in the list
+        wildcard_pattern = '*' + function_name.lower() + '*'
+    else:
+        wildcard_pattern = None
+
+    # Only the requested package's subtree is searched; by default both pyspedas and pytplot are searched
+    packages = [package] if package else [pyspedas, pytplot]
+    for package_obj in packages:
+        index = _function_index(package_obj)
+        # Separate comprehensions for the wildcard and substring matching avoid a test and branch in the inner loop
+        if wildcard_pattern is None:
+            matches = [entry for entry in index if function_name in entry[0]]
         else:
-            wildcard=False
-            wildcard_pattern=''
-
-        for _, modname, ispkg in combined_iterator:
-            if ispkg and 'qtplotter' not in modname.lower():
-                # Save the current stdout so that we can restore it later
-                original_stdout = sys.stdout
-
-                # Redirect stdout to a dummy stream
-                sys.stdout = io.StringIO()
-
-                try:
-                    module = importlib.import_module(modname)
-                    if not package_obj:
-                        package_obj = package
-
-                    # Restore the original stdout
-                    sys.stdout = original_stdout
-                    if not wildcard:
-                        list_functions_substring(module, package, function_name, package_obj)
-                    else:
-                        list_functions_wildcard(module, package, wildcard_pattern, package_obj)
-                except ImportError as e:
-                    # Restore the original stdout
-                    sys.stdout = original_stdout
-                    print(f"Error importing module {modname}: {e}")
-                finally:
-                    # Restore the original stdout
-                    sys.stdout = original_stdout
-
-    for module in [pyspedas, pytplot]:
-        if not package or module.__name__ in package.__name__:
-            traverse_modules(module, function_name, package)
+            matches = [entry for entry in index if fnmatchcase(entry[0].lower(), wildcard_pattern)]
+        # All the matches for a package are written at once, rather than with one print call each
+        if matches:
+            sys.stdout.write(''.join([_format_function(full_name, obj) for _, full_name, obj in matches]))
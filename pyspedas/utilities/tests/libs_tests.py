@@ -1,9 +1,10 @@
 import unittest
+from unittest import mock
 from io import StringIO
 import sys
 import pyspedas
 import pytplot
-from pyspedas.utilities.libs import libs
+from pyspedas.utilities.libs import libs, libs_cache_clear, _walk_package, _PACKAGE_MOD_CACHE, _FUNCTION_INDEX
 
 
 class LibsTestCase(unittest.TestCase):
@@ -83,5 +84,33 @@ class LibsTestCase(unittest.TestCase):
         output = sys.stdout.getvalue()
         self.assertNotIn('Error importing module pytplot.QtPlotter', output)
 
+    def test_cached_walk(self):
+        libs_cache_clear()
+        libs('get_data', package=pytplot)
+        first_output = sys.stdout.getvalue()
+        self.assertIn('pytplot', _PACKAGE_MOD_CACHE)
+        self.assertIn('pytplot', _FUNCTION_INDEX)
+
+        # The second search is answered from the cache, without walking the package again
+        sys.stdout = StringIO()
+        with mock.patch('pkgutil.iter_modules') as iter_modules:
+            libs('get_data', package=pytplot)
+        iter_modules.assert_not_called()
+        self.assertEqual(first_output, sys.stdout.getvalue())
+
+        # Clearing the cache makes the next search walk the package again
+        libs_cache_clear()
+        self.assertNotIn('pytplot', _PACKAGE_MOD_CACHE)
+        with mock.patch('pkgutil.iter_modules', return_value=[]) as iter_modules:
+            libs('get_data', package=pytplot)
+        iter_modules.assert_called()
+        libs_cache_clear()
+
+    def test_skipped_subpackages_pruned(self):
+        libs_cache_clear()
+        modnames = _walk_package(pyspedas) + _walk_package(pytplot)
+        self.assertIn('pyspedas.mms', modnames)
+        self.assertFalse([modname for modname in modnames if modname.endswith(('.tests', '.examples', '.QtPlotter'))])
+
 if __name__ == '__main__':
     unittest.main()